@@ -1,7 +1,7 @@
 import enum
 import typing as t
 
-from pydantic import Field, validator, constr
+from pydantic import Field, root_validator, conint, constr
 
 from configomatic import Configuration as BaseConfiguration, LoggingConfiguration
 
@@ -15,12 +15,29 @@ class ImagePullPolicy(str, enum.Enum):
     NEVER = "Never"
 
 
+#: Type for values that must be non-empty strings
+#:   Each call to constr builds a new type, so this is built once and shared by the
+#:   configuration and the base benchmark models
+NonEmptyStr = constr(min_length = 1)
+
+
 DEFAULT_HOSTS = """
 127.0.0.1  localhost
 ::1        localhost ip6-localhost ip6-loopback
 """
 
 
+#: The labels and annotations that are derived from the API group, with their suffixes
+DERIVED_LABEL_SUFFIXES = {
+    "kind_label": "benchmark-kind",
+    "namespace_label": "benchmark-namespace",
+    "name_label": "benchmark-name",
+    "component_label": "benchmark-component",
+    "hosts_from_label": "hosts-from",
+    "hosts_available_annotation": "hosts-available",
+}
+
+
 class Configuration(BaseConfiguration):
     """
     Top-level configuration model.
@@ -29,29 +46,39 @@ class Configuration(BaseConfiguration):
         default_path = "/etc/kube-perftest/config.yaml"
         path_env_var = "KUBE_PERFTEST_CONFIG"
         env_prefix = "KUBE_PERFTEST"
+        # The settings are shared by the whole operator, so prevent accidental changes
+        # Assigning to an attribute of the settings raises a TypeError - code that needs
+        # different settings should construct a new Configuration instead
+        allow_mutation = False
 
     #: The logging configuration
     logging: LoggingConfiguration = Field(default_factory = LoggingConfiguration)
 
     #: The API group of the cluster CRDs
-    api_group: constr(min_length = 1) = "perftest.stackhpc.com"
+    api_group: NonEmptyStr = "perftest.stackhpc.com"
     #: A list of categories to place CRDs into
-    crd_categories: t.List[constr(min_length = 1)] = Field(
+    crd_categories: t.List[NonEmptyStr] = Field(
         default_factory = lambda: ["perftest"]
     )
 
     #: The field manager name to use for server-side apply
-    easykube_field_manager: constr(min_length = 1) = "kube-perftest-operator"
+    easykube_field_manager: NonEmptyStr = "kube-perftest-operator"
+    #: The maximum number of concurrent connections to the Kubernetes API server
+    easykube_max_connections: conint(gt = 0) = 100
+    #: The maximum number of idle connections to keep open to the Kubernetes API server
+    #:   Handlers run concurrently, so we want enough pooled connections that requests
+    #:   are not forced to open (and then discard) a new TLS connection each time
+    easykube_max_keepalive_connections: conint(gt = 0) = 32
 
     #: The default image prefix to use for benchmark images
-    default_image_prefix: constr(min_length = 1) = "ghcr.io/stackhpc/kube-perftest-"
+    default_image_prefix: NonEmptyStr = "ghcr.io/stackhpc/kube-perftest-"
     #: The default tag to use for benchmark images
     #: The chart will set this to the tag that matches the operator image
-    default_image_tag: constr(min_length = 1) = "latest"
+    default_image_tag: NonEmptyStr = "latest"
     #: The image pull policy to use for benchmarks
     default_image_pull_policy: ImagePullPolicy = ImagePullPolicy.IF_NOT_PRESENT
     #: The default image to use for discovery init containers
-    discovery_container_image: constr(min_length = 1) = None
+    discovery_container_image: NonEmptyStr = None
 
     #: The name of the scheduler to use
     #:   Pod preemption, especially when combined with (anti-)affinity appears to be at
@@ -60,59 +87,60 @@ class Configuration(BaseConfiguration):
     #:   This means we don't benefit from resource-based gang scheduling, but the
     #:   pod preemption works which means pods get scheduled simultaneously properly
     #:   We still also benefit from Volcano's handling of job events
-    scheduler_name: constr(min_length = 1) = "default-scheduler"
+    scheduler_name: NonEmptyStr = "default-scheduler"
     #: The name of the Volcano queue to use
-    queue_name: constr(min_length = 1) = "default"
+    queue_name: NonEmptyStr = "default"
 
     #: Label specifying the kind of the benchmark that a resource belongs to
-    kind_label: constr(min_length = 1) = None
+    kind_label: NonEmptyStr = None
     #: Label specifying the namespace of the benchmark that a resource belongs to
-    namespace_label: constr(min_length = 1) = None
+    namespace_label: NonEmptyStr = None
     #: Label specifying the name of the benchmark that a resource belongs to
-    name_label: constr(min_length = 1) = None
+    name_label: NonEmptyStr = None
     #: Label specifying the component of the benchmark that a resource belongs to
-    component_label: constr(min_length = 1) = None
+    component_label: NonEmptyStr = None
 
     #: Label indicating that a configmap should be populated with hosts from a service
-    hosts_from_label: constr(min_length = 1) = None
+    hosts_from_label: NonEmptyStr = None
     #: The default hosts for the generated hosts files
-    default_hosts: constr(min_length = 1) = DEFAULT_HOSTS.strip()
+    default_hosts: NonEmptyStr = DEFAULT_HOSTS.strip()
     #: Annotation that is added to pods to indicate that the hosts are available
-    hosts_available_annotation: constr(min_length = 1) = None
+    hosts_available_annotation: NonEmptyStr = None
 
     #: The default priority when there are no existing priority classes
     #: By default, we use negative priorities so that jobs will not preempt other pods
     initial_priority: int = -1
     #: The prefix to use for generating resource names
-    resource_prefix: constr(min_length = 1) = "kube-perftest-"
-
-    @validator("discovery_container_image", pre = True, always = True)
-    def default_discovery_container_image(cls, v, *, values, **kwargs):
-        return v or f"{values['default_image_prefix']}discovery:{values['default_image_tag']}"
-
-    @validator("kind_label", pre = True, always = True)
-    def default_kind_label(cls, v, *, values, **kwargs):
-        return v or f"{values['api_group']}/benchmark-kind"
-
-    @validator("namespace_label", pre = True, always = True)
-    def default_namespace_label(cls, v, *, values, **kwargs):
-        return v or f"{values['api_group']}/benchmark-namespace"
-
-    @validator("name_label", pre = True, always = True)
-    def default_name_label(cls, v, *, values, **kwargs):
-        return v or f"{values['api_group']}/benchmark-name"
-
-    @validator("component_label", pre = True, always = True)
-    def default_component_label(cls, v, *, values, **kwargs):
-        return v or f"{values['api_group']}/benchmark-component"
-
-    @validator("hosts_from_label", pre = True, always = True)
-    def default_hosts_from_label(cls, v, *, values, **kwargs):
-        return v or f"{values['api_group']}/hosts-from"
-
-    @validator("hosts_available_annotation", pre = True, always = True)
-    def default_hosts_available_annotation(cls, v, *, values, **kwargs):
-        return v or f"{values['api_group']}/hosts-available"
+    resource_prefix: NonEmptyStr = "kube-perftest-"
+
+    @root_validator(pre = True)
+    def drop_empty_derived_values(cls, values):
+        """
+        Removes empty values for the derived values so that they are replaced by defaults.
+        """
+        values = dict(values)
+        for name in ("discovery_container_image", *DERIVED_LABEL_SUFFIXES):
+            # The raw values may be given using either the field name or the alias
+            for key in { name, cls.__fields__[name].alias }:
+                if key in values and not values[key]:
+                    del values[key]
+        return values
+
+    @root_validator(skip_on_failure = True)
+    def default_derived_values(cls, values):
+        """
+        Fills in any values that are derived from other values in a single pass.
+        """
+        image_prefix = values["default_image_prefix"]
+        image_tag = values["default_image_tag"]
+        api_group = values["api_group"]
+        values["discovery_container_image"] = (
+            values.get("discovery_container_image") or
+            f"{image_prefix}discovery:{image_tag}"
+        )
+        for key, suffix in DERIVED_LABEL_SUFFIXES.items():
+            values[key] = values.get(key) or f"{api_group}/{suffix}"
+        return values
 
 
 settings = Configuration()
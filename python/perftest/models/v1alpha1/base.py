@@ -2,10 +2,12 @@ import datetime
 import ipaddress
 import typing as t
 
-from pydantic import Field, constr
+from pydantic import Field
 
 from kube_custom_resource import CustomResource, schema
 
+# Imported under a private name so that it is not re-exported from the API package
+from ...config import NonEmptyStr as _NonEmptyStr
 from ...template import Loader
 
 
@@ -40,7 +42,7 @@ class BenchmarkSpec(schema.BaseModel):
         False,
         description = "Indicates whether to use host networking or not."
     )
-    network_name: t.Optional[constr(min_length = 1)] = Field(
+    network_name: t.Optional[_NonEmptyStr] = Field(
         None,
         description = (
             "The name of a Multus network over which to run the benchmark. "
@@ -92,19 +94,37 @@ class BenchmarkPhase(str, schema.Enum):
     FAILED = "Failed"
 
 
+# The benchmark phase to use for each Volcano job phase
+# The benchmark phase matches the Volcano job phase until it reaches "Completed"
+# At that point, the benchmark goes into a Summarising phase, which triggers the
+# calculation of the overall result
+BENCHMARK_PHASES_BY_JOB_PHASE = {
+    **{phase.value: phase for phase in BenchmarkPhase},
+    "Completed": BenchmarkPhase.SUMMARISING,
+}
+
+# The phases in which a benchmark is finished
+BENCHMARK_FINISHED_PHASES = frozenset({
+    BenchmarkPhase.ABORTED,
+    BenchmarkPhase.COMPLETED,
+    BenchmarkPhase.TERMINATED,
+    BenchmarkPhase.FAILED,
+})
+
+
 class ResourceRef(schema.BaseModel):
     """
     Reference to a resource that is part of a benchmark.
     """
-    api_version: constr(min_length = 1) = Field(
+    api_version: _NonEmptyStr = Field(
         ...,
         description = "The API version of the resource."
     )
-    kind: constr(min_length = 1) = Field(
+    kind: _NonEmptyStr = Field(
         ...,
         description = "The kind of the resource."
     )
-    name: constr(min_length = 1) = Field(
+    name: _NonEmptyStr = Field(
         ...,
         description = "The name of the resource."
     )
@@ -118,7 +138,7 @@ class PodInfo(schema.BaseModel):
         ...,
         description = "The IP of the pod."
     )
-    node_name: constr(min_length = 1) = Field(
+    node_name: _NonEmptyStr = Field(
         ...,
         description = "The name of the node that the pod was scheduled on."
     )
@@ -147,7 +167,7 @@ class BenchmarkStatus(schema.BaseModel):
         BenchmarkPhase.UNKNOWN,
         description = "The phase of the benchmark."
     )
-    priority_class_name: t.Optional[constr(min_length = 1)] = Field(
+    priority_class_name: t.Optional[_NonEmptyStr] = Field(
         None,
         description = "The name of the priority class for the benchmark."
     )
@@ -192,14 +212,8 @@ class Benchmark(CustomResource, abstract = True):
         Update the status of this benchmark to reflect a modification to the Volcano job.
         """
         # By default, update the benchmark phase to match the job
-        # The benchmark phase matches the Volcano job phase until it reaches "Completed"
-        # At that point, the benchmark goes into a Summarising phase, which triggers the
-        # calculation of the overall result
         job_phase = job.get("status", {}).get("state", {}).get("phase", "Unknown")
-        if job_phase == "Completed":
-            self.status.phase = BenchmarkPhase.SUMMARISING
-        else:
-            self.status.phase = BenchmarkPhase(job_phase)
+        self.status.phase = BENCHMARK_PHASES_BY_JOB_PHASE[job_phase]
 
     async def pod_modified(
         self,
@@ -210,6 +224,9 @@ class Benchmark(CustomResource, abstract = True):
         Update the status of this benchmark to reflect a modification to one of its pods.
 
         Receives the pod instance and an async function that can be called to get the pod log.
+
+        Pod events continue to arrive after a pod has succeeded, so implementations should
+        only fetch the pod log if it has not already been recorded.
         """
         raise NotImplementedError
 
@@ -1,8 +1,8 @@
-import itertools as it
-import json
 import re
 import typing as t
 
+import orjson
+
 from pydantic import Field, constr
 
 from kube_custom_resource import schema
@@ -285,7 +285,7 @@ class Fio(
                 self.status.master_pod = base.PodInfo.from_pod(pod)
             else:
                 self.status.worker_pods[pod["metadata"]["name"]] = base.PodInfo.from_pod(pod)
-        elif pod_phase == "Succeeded":
+        elif pod_phase == "Succeeded" and not self.status.client_log:
             self.status.client_log = await fetch_pod_log()
 
     def summarise(self):
@@ -294,7 +294,7 @@ class Fio(
             raise PodResultsIncompleteError("master pod has not recorded a result yet")
         # Compute the result from the client log
         try:
-            fio_json = json.loads(self.status.client_log)
+            fio_json = orjson.loads(self.status.client_log)
         except:
             raise PodLogFormatError("pod log is not of the expected format")
 
@@ -303,7 +303,13 @@ class Fio(
             # 'All clients' log section
             aggregate_data = fio_json['client_stats'][0]
         else:
-            aggregate_data = [i for i in fio_json['client_stats'] if i['jobname'] == 'All clients'][0]
+            # Stop scanning as soon as we find the aggregate entry
+            aggregate_data = next(
+                (i for i in fio_json['client_stats'] if i['jobname'] == 'All clients'),
+                None
+            )
+            if aggregate_data is None:
+                raise PodLogFormatError("pod log is not of the expected format")
 
         # Format results nicely for printing
         self.status.read_bw_result = "{0} {1}B/s".format(*format_amount(aggregate_data['read']['bw'], "K"))
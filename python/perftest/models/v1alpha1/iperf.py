@@ -1,4 +1,3 @@
-import itertools as it
 import re
 import typing as t
 
@@ -8,11 +7,15 @@ from kube_custom_resource import schema
 
 from ...config import settings
 from ...errors import PodLogFormatError, PodResultsIncompleteError
-from ...utils import format_amount
+from ...utils import format_amount, lines_from
 
 from . import base
 
 
+IPERF_HEADER_REGEX = re.compile(r"^\[ *ID\]", re.MULTILINE)
+IPERF_RESULT_REGEX = re.compile(r"^\[ *([a-zA-Z0-9]+)\].*?(\d+) KBytes +(\d+) Kbits/sec")
+
+
 class IPerfSpec(base.BenchmarkSpec):
     """
     Defines the parameters for the iperf benchmark.
@@ -177,7 +180,7 @@ class IPerf(
             setattr(self.status, f"{component}_pod", base.PodInfo.from_pod(pod))
         # When a pod succeeds, record the pod log
         # Note that only the client pod ever succeeds as the server is forcibly terminated
-        elif pod_phase == "Succeeded":
+        elif pod_phase == "Succeeded" and not self.status.client_log:
             self.status.client_log = await fetch_pod_log()
 
     def summarise(self):
@@ -185,18 +188,23 @@ class IPerf(
         if not self.status.client_log:
             raise PodResultsIncompleteError("client pod has not recorded logs yet")
         # Compute the result from the client log
-        # Drop the lines from the log until we reach the start of the results
-        lines = it.dropwhile(lambda l: re.match(r"^\[ *ID\]", l) is None, self.status.client_log.splitlines())
-        # Drop the header line
+        lines = lines_from(IPERF_HEADER_REGEX, self.status.client_log)
+        # Skip the header
         _ = next(lines)
         # Collect stream results until the end of the log
         stream_results = {}
         for line in lines:
-            match = re.search(r"^\[ *([a-zA-Z0-9]+)\].*?(\d+) KBytes +(\d+) Kbits/sec", line)
+            # Only run the regex on lines that can possibly contain a result
+            if "Kbits/sec" not in line:
+                continue
+            match = IPERF_RESULT_REGEX.search(line)
             if match is not None:
-                stream_results[match.group(1)] = IPerfSingleResult(
-                    transfer = match.group(2),
-                    bandwidth = match.group(3)
+                # The regex only matches digits, so build each stream result without running
+                # the field validators
+                # The overall result is still validated when it is assigned to the status
+                stream_results[match.group(1)] = IPerfSingleResult.construct(
+                    transfer = int(match.group(2)),
+                    bandwidth = int(match.group(3))
                 )
             else:
                 continue
@@ -209,7 +217,7 @@ class IPerf(
         ):
             raise PodLogFormatError("pod log is not of the expected format")
         # Store the detailed result
-        self.status.result = IPerfResult(
+        self.status.result = IPerfResult.construct(
             streams = stream_results,
             # If there is no explicit sum result, use the result from the single stream
             sum = sum_result or next(iter(stream_results.values()))
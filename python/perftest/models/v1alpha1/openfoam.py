@@ -11,7 +11,7 @@ from ...errors import PodLogFormatError, PodResultsIncompleteError
 from . import base
 
 
-TIME_REGEX = re.compile(r"^(?P<type>real|user|sys)\s+(?P<time>\d+\.\d+)")
+TIME_REGEX = re.compile(r"^(?P<type>real|user|sys)\s+(?P<time>\d+\.\d+)", re.MULTILINE)
 
 
 class MPITransport(str, schema.Enum):
@@ -211,29 +211,20 @@ class OpenFOAM(
                 self.status.master_pod = base.PodInfo.from_pod(pod)
             else:
                 self.status.worker_pods[pod["metadata"]["name"]] = base.PodInfo.from_pod(pod)
-        elif pod_phase == "Succeeded":
+        elif pod_phase == "Succeeded" and not self.status.result:
             pod_log = await fetch_pod_log()
-            # Extract the time info from the pod log
-            wallclock_time = None
-            user_time = None
-            sys_time = None
-            for line in pod_log.splitlines():
-                match = TIME_REGEX.match(line)
-                if match is not None:
-                    if match.group("type") == "real":
-                        wallclock_time = match.group("time")
-                    elif match.group("type") == "user":
-                        user_time = match.group("time")
-                    elif match.group("type") == "sys":
-                        sys_time = match.group("time")
-                    else:
-                        raise PodLogFormatError("this is impossible")
-            if wallclock_time is None or user_time is None or sys_time is None:
+            # Extract the time info from the pod log in a single pass over the whole log
+            # If a type appears more than once, the last occurrence wins
+            times = {
+                match.group("type"): match.group("time")
+                for match in TIME_REGEX.finditer(pod_log)
+            }
+            if len(times) != 3:
                 raise PodLogFormatError("unable to extract timing information")
-            self.status.result = OpenFOAMResult(
-                wallclock_time = wallclock_time,
-                user_time = user_time,
-                sys_time = sys_time
+            self.status.result = OpenFOAMResult.construct(
+                wallclock_time = float(times["real"]),
+                user_time = float(times["user"]),
+                sys_time = float(times["sys"])
             )
 
     def summarise(self):
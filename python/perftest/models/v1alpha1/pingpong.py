@@ -1,4 +1,3 @@
-import itertools as it
 import re
 import typing as t
 
@@ -8,9 +7,11 @@ from kube_custom_resource import schema
 
 from ...config import settings
 from ...errors import PodLogFormatError, PodResultsIncompleteError
+from ...utils import lines_from
 
 from . import base
 
+MPI_PINGPONG_HEADER = re.compile(r"^[ \t]*#bytes", re.MULTILINE)
 MPI_PINGPONG_UNITS = re.compile(
     r"t\[(?P<time>[^\]]+)\]"
     r"\s+"
@@ -216,7 +217,7 @@ class MPIPingPong(
         if pod_component == "master":
             if pod_phase == "Running":
                 self.status.master_pod = base.PodInfo.from_pod(pod)
-            elif pod_phase == "Succeeded":
+            elif pod_phase == "Succeeded" and not self.status.master_log:
                 self.status.master_log = await fetch_pod_log()
         elif pod_phase == "Running":
             self.status.worker_pods[pod["metadata"]["name"]] = base.PodInfo.from_pod(pod)
@@ -227,11 +228,7 @@ class MPIPingPong(
         """
         if not self.status.master_log:
             raise PodResultsIncompleteError("master pod has not recorded a log yet")
-        # Drop the lines from the log until we reach the start of the results
-        lines = it.dropwhile(
-            lambda l: not l.strip().startswith("#bytes"),
-            self.status.master_log.splitlines()
-        )
+        lines = lines_from(MPI_PINGPONG_HEADER, self.status.master_log)
         # Extract the bandwidth units from the header
         match = MPI_PINGPONG_UNITS.search(next(lines))
         if match is not None:
@@ -244,13 +241,18 @@ class MPIPingPong(
         peak_bw_result = None
         min_lat_result = None
         for line in lines:
-            match = MPI_PINGPONG_RESULT.search(line.strip())
+            line = line.strip()
+            # Result rows always start with the message size, so only run the regex
+            # on lines that start with a digit
+            if not line[:1].isdigit():
+                continue
+            match = MPI_PINGPONG_RESULT.match(line)
             if match is not None:
-                result = MPIPingPongResult(
-                    bytes = match.group("bytes"),
-                    repetitions = match.group("repetitions"),
-                    time = match.group("time"),
-                    bandwidth = match.group("bandwidth")
+                result = MPIPingPongResult.construct(
+                    bytes = int(match.group("bytes")),
+                    repetitions = int(match.group("repetitions")),
+                    time = float(match.group("time")),
+                    bandwidth = float(match.group("bandwidth"))
                 )
                 results.append(result)
                 if not peak_bw_result or result.bandwidth > peak_bw_result.bandwidth:
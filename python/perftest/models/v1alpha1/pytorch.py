@@ -231,7 +231,7 @@ class PyTorch(
         pod_phase = pod.get("status", {}).get("phase", "Unknown")
         if pod_phase == "Running":
             self.status.worker_pod = base.PodInfo.from_pod(pod)
-        elif pod_phase == "Succeeded":
+        elif pod_phase == "Succeeded" and not self.status.client_log:
             self.status.client_log = await fetch_pod_log()
 
     def summarise(self):
@@ -1,4 +1,3 @@
-import itertools as it
 import re
 import typing as t
 
@@ -8,10 +7,13 @@ from kube_custom_resource import schema
 
 from ...config import settings
 from ...errors import PodLogFormatError, PodResultsIncompleteError
+from ...utils import lines_from
 
 from . import base
 
 
+RDMA_HEADER_REGEX = re.compile(r"^[ \t]*#bytes", re.MULTILINE)
+
 RDMA_BANDWIDTH_REGEX = re.compile(
     r"(?P<bytes>\d+)"
     r"\s+"
@@ -121,12 +123,12 @@ class RDMABenchmark(base.Benchmark, abstract = True):
         if pod_phase == "Running":
             setattr(self.status, f"{component}_pod", base.PodInfo.from_pod(pod))
         # When a client pod succeeds, record the pod log
-        elif component == "client" and pod_phase == "Succeeded":
+        elif component == "client" and pod_phase == "Succeeded" and not self.status.client_log:
             self.status.client_log = await fetch_pod_log()
 
     def extract_result(self, pod_log_lines: t.Iterable[str]):
         """
-        Extract a result from the client pod log.
+        Extract a result from the lines of the client pod log that follow the results header.
         """
         raise NotImplementedError
 
@@ -134,7 +136,10 @@ class RDMABenchmark(base.Benchmark, abstract = True):
         # If the client log has not yet been recorded, bail
         if not self.status.client_log:
             raise PodResultsIncompleteError("client pod has not recorded logs yet")
-        self.extract_result(self.status.client_log.splitlines())
+        lines = lines_from(RDMA_HEADER_REGEX, self.status.client_log)
+        # Skip the header
+        _ = next(lines)
+        self.extract_result(lines)
 
 
 class RDMABandwidthSpec(RDMASpec):
@@ -272,15 +277,12 @@ class RDMABandwidth(
     )
 
     def extract_result(self, pod_log_lines: t.Iterable[str]):
-        # Drop the lines from the log until we reach the start of the results
-        lines = it.dropwhile(lambda l: not l.strip().startswith("#bytes"), pod_log_lines)
-        # Skip the header
-        _ = next(lines)
         # Collect the results for each message size along with the peak result
         results = []
         peak_result = None
-        for line in lines:
-            match = RDMA_BANDWIDTH_REGEX.search(line.strip())
+        for line in pod_log_lines:
+            # The pattern is unanchored, so there is no need to copy the line to strip it
+            match = RDMA_BANDWIDTH_REGEX.search(line)
             if match is not None:
                 result = RDMABandwidthResult(
                     bytes = match.group("bytes"),
@@ -435,15 +437,12 @@ class RDMALatency(
     )
 
     def extract_result(self, pod_log_lines: t.Iterable[str]):
-        # Drop the lines from the log until we reach the start of the results
-        lines = it.dropwhile(lambda l: not l.strip().startswith("#bytes"), pod_log_lines)
-        # Skip the header
-        _ = next(lines)
         # Collect the results for each message size along with the peak result
         results = []
         min_result = None
-        for line in lines:
-            match = RDMA_LATENCY_REGEX.search(line.strip())
+        for line in pod_log_lines:
+            # The pattern is unanchored, so there is no need to copy the line to strip it
+            match = RDMA_LATENCY_REGEX.search(line)
             if match is not None:
                 result = RDMALatencyResult(
                     bytes = match.group("bytes"),
@@ -61,13 +61,14 @@ class BenchmarkSetPermutations(schema.BaseModel):
         Returns all the permutations for the benchmark set.
         """
         if self.product or self.explicit:
-            yield from (
-                dict(permutation)
-                for permutation in itertools.product(*(
-                    [(k, v) for v in vs]
-                    for k, vs in self.product.items()
-                ))
-            )
+            # Take the product of the values directly and zip each combination with the
+            # keys, rather than first building a list of (key, value) pairs for every value
+            if self.product:
+                keys = list(self.product.keys())
+                yield from (
+                    dict(zip(keys, values))
+                    for values in itertools.product(*self.product.values())
+                )
             yield from self.explicit
         else:
             yield dict()
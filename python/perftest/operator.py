@@ -3,9 +3,10 @@ import datetime
 import functools
 import itertools
 import logging
-import math
 import sys
+import typing as t
 
+import httpx
 import kopf
 
 from pydantic.json import custom_pydantic_encoder
@@ -27,26 +28,32 @@ logger = logging.getLogger(__name__)
 #####
 # Template loader for rendering benchmark resources
 TEMPLATE_LOADER: template.Loader = template.Loader(settings = settings)
+# Type encoders for the custom JSON encoder used by easykube, which produce UTC
+# ISO8601-compliant strings for datetimes
+# These are defined once rather than being rebuilt every time the encoder is called
+JSON_TYPE_ENCODERS = {
+    datetime.datetime: lambda dt: (
+        dt
+            .astimezone(tz = datetime.timezone.utc)
+            .strftime("%Y-%m-%dT%H:%M:%SZ")
+    )
+}
 # easykube client configured from the environment
 # This means KUBECONFIG from envvar if specified, then service account if available,
 # then default config file if available
 EK_CLIENT: AsyncClient = (
     Configuration
         .from_environment(
-            # Custom JSON encoder derived from the Pydantic encoder that produces UTC
-            # ISO8601-compliant strings for datetimes.
-            json_encoder = lambda obj: custom_pydantic_encoder(
-                {
-                    datetime.datetime: lambda dt: (
-                        dt
-                            .astimezone(tz = datetime.timezone.utc)
-                            .strftime("%Y-%m-%dT%H:%M:%SZ")
-                    )
-                },
-                obj
+            # Custom JSON encoder derived from the Pydantic encoder
+            json_encoder = functools.partial(custom_pydantic_encoder, JSON_TYPE_ENCODERS)
+        )
+        .async_client(
+            default_field_manager = settings.easykube_field_manager,
+            limits = httpx.Limits(
+                max_connections = settings.easykube_max_connections,
+                max_keepalive_connections = settings.easykube_max_keepalive_connections
             )
         )
-        .async_client(default_field_manager = settings.easykube_field_manager)
 )
 # Initialise the registry, discover custom resource models and build CRDs
 REGISTRY: CustomResourceRegistry = CustomResourceRegistry(
@@ -54,6 +61,14 @@ REGISTRY: CustomResourceRegistry = CustomResourceRegistry(
     settings.crd_categories
 )
 REGISTRY.discover_models(models)
+# The API version to use for each benchmark kind in the registry, excluding the benchmark set
+# This is the storage version of each CRD, computed once so that handlers do not need to
+# re-walk the CRD versions
+BENCHMARK_API_VERSIONS: t.Dict[str, str] = {
+    crd.kind: f"{crd.api_group}/{next(k for k, v in crd.versions.items() if v.storage)}"
+    for crd in REGISTRY
+    if crd.kind != api.BenchmarkSet._meta.kind
+}
 # Atomic integer for holding the current priority
 PRIORITY_LOCK: asyncio.Lock
 
@@ -77,10 +92,15 @@ async def on_startup(**kwargs):
         global PRIORITY_LOCK
         PRIORITY_LOCK = asyncio.Lock()
         # Install the CRDs for the models in the registry
-        for crd in REGISTRY:
-            # We include default values in the CRDs, as freezing defaults at create
-            # time is appropriate for our use case
-            await EK_CLIENT.apply_object(crd.kubernetes_resource(include_defaults = True))
+        # The CRDs are independent, so we install them concurrently
+        # We include default values in the CRDs, as freezing defaults at create
+        # time is appropriate for our use case
+        await asyncio.gather(
+            *(
+                EK_CLIENT.apply_object(crd.kubernetes_resource(include_defaults = True))
+                for crd in REGISTRY
+            )
+        )
     except Exception:
         logger.exception("error during initialisation - exiting")
         sys.exit(1)
@@ -106,13 +126,8 @@ def benchmark_handler(register_fn, **kwargs):
             if "benchmark" not in handler_kwargs:
                 handler_kwargs["benchmark"] = REGISTRY.get_model_instance(handler_kwargs["body"])
             return await func(**handler_kwargs)
-        for crd in REGISTRY:
-            preferred_version = next(k for k, v in crd.versions.items() if v.storage)
-            api_version = f"{crd.api_group}/{preferred_version}"
-            # Ignore the benchmarkset
-            if crd.kind == api.BenchmarkSet._meta.kind:
-                continue
-            handler = register_fn(api_version, crd.kind, **kwargs)(handler)
+        for kind, api_version in BENCHMARK_API_VERSIONS.items():
+            handler = register_fn(api_version, kind, **kwargs)(handler)
         return handler
     return decorator
 
@@ -141,6 +156,25 @@ async def save_benchmark_status(benchmark):
         return REGISTRY.get_model_instance(data)
 
 
+async def delete_benchmark_resources(benchmark):
+    """
+    Deletes the managed resources and the priority class for the given benchmark.
+    """
+    async def delete_managed_resource(ref):
+        resource = await EK_CLIENT.api(ref.api_version).resource(ref.kind)
+        await resource.delete(ref.name, namespace = benchmark.metadata.namespace)
+
+    async def delete_priority_class():
+        resource = await EK_CLIENT.api("scheduling.k8s.io/v1").resource("priorityclasses")
+        await resource.delete(benchmark.status.priority_class_name)
+
+    # There are no ordering constraints between the deletions, so issue them concurrently
+    await asyncio.gather(
+        *(delete_managed_resource(ref) for ref in benchmark.status.managed_resources),
+        delete_priority_class()
+    )
+
+
 @benchmark_handler(kopf.on.create)
 async def handle_benchmark_created(benchmark, **kwargs):
     """
@@ -189,28 +223,37 @@ async def handle_benchmark_created(benchmark, **kwargs):
             )
     # Store the name of the priority class on the benchmark
     benchmark.status.priority_class_name = priority_class["metadata"]["name"]
-    # Apply the benchmark resources to the cluster
-    for resource in benchmark.get_resources(TEMPLATE_LOADER):
-        # Make sure to adopt the resources so that they get removed with the benchmark
+    # Adopt the benchmark resources so that they get removed with the benchmark
+    # The labels and owner references are the same for every resource, so build them once
+    labels = {
+        settings.kind_label: benchmark.kind,
+        settings.namespace_label: benchmark.metadata.namespace,
+        settings.name_label: benchmark.metadata.name,
+    }
+    owner_references = [
+        {
+            "apiVersion": benchmark.api_version,
+            "kind": benchmark.kind,
+            "name": benchmark.metadata.name,
+            "uid": benchmark.metadata.uid,
+            "blockOwnerDeletion": True,
+            "controller": True,
+        },
+    ]
+    resources = list(benchmark.get_resources(TEMPLATE_LOADER))
+    for resource in resources:
         metadata = resource.setdefault("metadata", {})
-        metadata["labels"].update({
-            settings.kind_label: benchmark.kind,
-            settings.namespace_label: benchmark.metadata.namespace,
-            settings.name_label: benchmark.metadata.name,
-        })
+        metadata["labels"].update(labels)
         metadata["namespace"] = benchmark.metadata.namespace
-        metadata["ownerReferences"] = [
-            {
-                "apiVersion": benchmark.api_version,
-                "kind": benchmark.kind,
-                "name": benchmark.metadata.name,
-                "uid": benchmark.metadata.uid,
-                "blockOwnerDeletion": True,
-                "controller": True,
-            },
-        ]
-        applied = await EK_CLIENT.apply_object(resource)
-        # Store a reference to the resource so it can be deleted later
+        metadata["ownerReferences"] = owner_references
+    # Apply the benchmark resources to the cluster
+    # There are no ordering constraints between the resources, e.g. pods wait for the
+    # discovery configmap to be populated anyway, so apply them concurrently
+    applied_resources = await asyncio.gather(
+        *(EK_CLIENT.apply_object(resource) for resource in resources)
+    )
+    # Store a reference to each resource so it can be deleted later
+    for applied in applied_resources:
         benchmark.status.managed_resources.append(
             api.ResourceRef(
                 api_version = applied["apiVersion"],
@@ -228,12 +271,7 @@ async def handle_benchmark_status_changed(benchmark, **kwargs):
     Executes when either the phase or the summary result for a benchmark changes.
     """
     # If the benchmark is transitioning to a finished state, set the finished time
-    if benchmark.status.phase in {
-        api.BenchmarkPhase.ABORTED,
-        api.BenchmarkPhase.COMPLETED,
-        api.BenchmarkPhase.TERMINATED,
-        api.BenchmarkPhase.FAILED,
-    }:
+    if benchmark.status.phase in api.BENCHMARK_FINISHED_PHASES:
         if not benchmark.status.finished_at:
             benchmark.status.finished_at = datetime.datetime.now()
             _ = await save_benchmark_status(benchmark)
@@ -250,17 +288,23 @@ async def handle_benchmark_status_changed(benchmark, **kwargs):
             None
         )
         if ref:
-            resource = await EK_CLIENT.api(ref.api_version).resource(ref.kind)
+            ekapi = EK_CLIENT.api(ref.api_version)
+            resource = await ekapi.resource(f"{api.BenchmarkSet._meta.plural_name}/status")
+            succeeded = benchmark.status.phase == api.BenchmarkPhase.COMPLETED
             try:
-                benchmark_set = api.BenchmarkSet.parse_obj(
-                    await resource.fetch(
-                        ref.name,
-                        namespace = benchmark.metadata.namespace
-                    )
+                # Use a merge patch that adds just this benchmark to the completed map
+                # This avoids fetching the set and re-applying every completion so far
+                _ = await resource.patch(
+                    ref.name,
+                    {
+                        "status": {
+                            "completed": {
+                                benchmark.metadata.name: succeeded,
+                            },
+                        },
+                    },
+                    namespace = benchmark.metadata.namespace
                 )
-                succeeded = benchmark.status.phase == api.BenchmarkPhase.COMPLETED
-                benchmark_set.status.completed[benchmark.metadata.name] = succeeded
-                _ = await save_benchmark_status(benchmark_set)
             except ApiError as exc:
                 if exc.status_code != 404:
                     raise
@@ -270,8 +314,10 @@ async def handle_benchmark_status_changed(benchmark, **kwargs):
             _ = await save_benchmark_status(benchmark)
     elif benchmark.status.phase == api.BenchmarkPhase.SUMMARISING:
         # Allow the benchmark to summarise itself and save
+        # Summarising parses the pod logs, which can be large, so do it in a worker
+        # thread to avoid blocking the event loop for other handlers
         try:
-            benchmark.summarise()
+            await asyncio.to_thread(benchmark.summarise)
         except errors.PodResultsIncompleteError as exc:
             # Convert this into a temporary error with a short delay, as it is likely
             # to be resolved quickly
@@ -279,12 +325,7 @@ async def handle_benchmark_status_changed(benchmark, **kwargs):
         else:
             benchmark = await save_benchmark_status(benchmark)
         # Once the benchmark summary has been saved successfully, we can delete the managed resources
-        for ref in benchmark.status.managed_resources:
-            resource = await EK_CLIENT.api(ref.api_version).resource(ref.kind)
-            await resource.delete(ref.name, namespace = benchmark.metadata.namespace)
-        # Make sure to delete the priority class
-        resource = await EK_CLIENT.api("scheduling.k8s.io/v1").resource("priorityclasses")
-        _ = await resource.delete(benchmark.status.priority_class_name)
+        await delete_benchmark_resources(benchmark)
         # Once the resources are deleted, we can mark the benchmark as completed
         benchmark.status.phase = api.BenchmarkPhase.COMPLETED
         benchmark.status.managed_resources = []
@@ -296,12 +337,7 @@ async def handle_benchmark_deleted(benchmark, **kwargs):
     """
     Executes when a benchmark is deleted.
     """
-    for ref in benchmark.status.managed_resources:
-        resource = await EK_CLIENT.api(ref.api_version).resource(ref.kind)
-        await resource.delete(ref.name, namespace = benchmark.metadata.namespace)
-    # Make sure to delete the priority class
-    resource = await EK_CLIENT.api("scheduling.k8s.io/v1").resource("priorityclasses")
-    await resource.delete(benchmark.status.priority_class_name)
+    await delete_benchmark_resources(benchmark)
 
 
 def on_benchmark_resource_event(*args, **kwargs):
@@ -312,12 +348,15 @@ def on_benchmark_resource_event(*args, **kwargs):
     def decorator(func):
         @functools.wraps(func)
         async def handler(**handler_kwargs):
+            kind = handler_kwargs["labels"][settings.kind_label]
+            # We fetch the benchmark using the storage version of its CRD, which we assume
+            # is the version that handlers expect, rather than the server's preferred version
+            ekapi = EK_CLIENT.api(BENCHMARK_API_VERSIONS[kind])
+            resource = await ekapi.resource(kind)
             # Implement retries for kopf temporary errors
             # kopf does not provide this for event handlers normally, but it is important
             # to deal with conflicts when applying updates to benchmark state
             while True:
-                ekapi = await EK_CLIENT.api_preferred_version(settings.api_group)
-                resource = await ekapi.resource(handler_kwargs["labels"][settings.kind_label])
                 try:
                     benchmark = REGISTRY.get_model_instance(
                         await resource.fetch(
@@ -340,7 +379,7 @@ def on_benchmark_resource_event(*args, **kwargs):
 
 
 @on_benchmark_resource_event("batch.volcano.sh", "job")
-async def handle_job_event(benchmark, body, **kwargs):
+async def handle_job_event(type, benchmark, body, **kwargs):
     """
     Executes whenever an event occurs for a Volcano job that is part of a benchmark.
     """
@@ -350,8 +389,12 @@ async def handle_job_event(benchmark, body, **kwargs):
     if benchmark.status.phase == api.BenchmarkPhase.COMPLETED:
         return
     # Allow the benchmark to update it's status based on the job
+    previous_status = benchmark.status.dict()
     benchmark.job_modified(body)
-    _ = await save_benchmark_status(benchmark)
+    # Volcano updates the job status many times without changing its phase, so only
+    # write the status when the benchmark has actually changed
+    if benchmark.status.dict() != previous_status:
+        _ = await save_benchmark_status(benchmark)
 
 
 @on_benchmark_resource_event("pod")
@@ -369,8 +412,12 @@ async def handle_pod_event(type, benchmark, body, name, namespace, status, **kwa
     async def fetch_pod_log() -> str:
         resource = await EK_CLIENT.api("v1").resource("pods/log")
         return await resource.fetch(name, namespace = namespace)
+    previous_status = benchmark.status.dict()
     await benchmark.pod_modified(body, fetch_pod_log)
-    _ = await save_benchmark_status(benchmark)
+    # Pods emit many events that do not affect the benchmark, e.g. repeated reports
+    # of the same phase, so only write the status when it has actually changed
+    if benchmark.status.dict() != previous_status:
+        _ = await save_benchmark_status(benchmark)
 
 
 @on_benchmark_resource_event("configmaps", labels = { settings.hosts_from_label: kopf.PRESENT })
@@ -394,6 +441,11 @@ async def handle_discovery_configmap_event(type, benchmark, body, name, namespac
         settings.name_label: benchmark.metadata.name,
     }
     async for pod in resource.list(labels = labels):
+        # The configmap receives further events after the hosts are written, so skip
+        # any pods that have already been annotated rather than patching them again
+        annotations = pod.metadata.get("annotations", {})
+        if annotations.get(settings.hosts_available_annotation) == "yes":
+            continue
         _ = await resource.patch(
             pod.metadata.name,
             {
@@ -452,6 +504,17 @@ async def handle_endpoints_event(type, benchmark, body, name, namespace, **kwarg
                     else:
                         continue
                 ips[f"{hostname}.{name}"] = f"{address['ip']}  {hostname}.{name}  {hostname}"
+    # If we have an IP for each pod, write the hosts file
+    # If not, write an empty hosts file
+    hosts = (
+        "\n".join([settings.default_hosts] + list(ips.values()))
+        if not expected.difference(ips.keys())
+        else ""
+    )
+    # Endpoints change many times while pods start up without affecting the hosts,
+    # e.g. when addresses move from not-ready to ready, so skip no-op updates
+    if configmap.data.get("hosts", "") == hosts:
+        return
     _ = await resource.patch(
         configmap.metadata.name,
         {
@@ -459,13 +522,7 @@ async def handle_endpoints_event(type, benchmark, body, name, namespace, **kwarg
                 "resourceVersion": configmap.metadata["resourceVersion"],
             },
             "data": {
-                # If we have an IP for each pod, write the hosts file
-                # If not, write an empty hosts file
-                "hosts": (
-                    "\n".join([settings.default_hosts] + list(ips.values()))
-                    if not expected.difference(ips.keys())
-                    else ""
-                ),
+                "hosts": hosts,
             },
         },
         namespace = configmap.metadata.namespace
@@ -491,10 +548,23 @@ async def handle_benchmark_set_created(body, **kwargs):
     await save_benchmark_status(benchmark_set)
     # Calculate the width that we want to pad indexes to
     # We do this so that benchmarks are ordered by default
-    padding_width = math.floor(math.log(benchmark_set.status.count, 10)) + 1
+    padding_width = len(str(benchmark_set.status.count))
+    # The owner references are the same for every benchmark in the set
+    owner_references = [
+        {
+            "apiVersion": benchmark_set.api_version,
+            "kind": benchmark_set.kind,
+            "name": benchmark_set.metadata.name,
+            "uid": benchmark_set.metadata.uid,
+            "blockOwnerDeletion": True,
+            "controller": True,
+        },
+    ]
     # Produce the resources for the benchmark set
     idx = 1
     for permutation in benchmark_set.spec.permutations.get_permutations():
+        # The spec only depends on the permutation, so merge it once for all the repetitions
+        spec = utils.mergeconcat(benchmark_set.spec.template.spec, permutation)
         for _ in range(benchmark_set.spec.repetitions):
             resource = {
                 "apiVersion": benchmark_set.spec.template.api_version,
@@ -503,18 +573,9 @@ async def handle_benchmark_set_created(body, **kwargs):
                     # Use a name that is unique to the permutation
                     "name": f"{benchmark_set.metadata.name}-{str(idx).zfill(padding_width)}",
                     "namespace": benchmark_set.metadata.namespace,
-                    "ownerReferences": [
-                        {
-                            "apiVersion": benchmark_set.api_version,
-                            "kind": benchmark_set.kind,
-                            "name": benchmark_set.metadata.name,
-                            "uid": benchmark_set.metadata.uid,
-                            "blockOwnerDeletion": True,
-                            "controller": True,
-                        },
-                    ]
+                    "ownerReferences": owner_references,
                 },
-                "spec": utils.mergeconcat(benchmark_set.spec.template.spec, permutation)
+                "spec": spec,
             }
             _ = await EK_CLIENT.apply_object(resource)
             idx = idx + 1
@@ -526,12 +587,10 @@ async def handle_benchmark_set_completed(body, **kwargs):
     Executed whenever a completed benchmark is registered for a benchmark set.
     """
     benchmark_set = api.BenchmarkSet.parse_obj(body)
-    succeeded = failed = 0
-    for completed in benchmark_set.status.completed.values():
-        if completed:
-            succeeded = succeeded + 1
-        else:
-            failed = failed + 1
+    # The completed map stores a boolean success flag for each benchmark, so the
+    # counts can be taken in C rather than with a Python-level loop and branch
+    succeeded = sum(benchmark_set.status.completed.values())
+    failed = len(benchmark_set.status.completed) - succeeded
     benchmark_set.status.succeeded = succeeded
     benchmark_set.status.failed = failed
     if (succeeded + failed) == benchmark_set.status.count:
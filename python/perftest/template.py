@@ -1,8 +1,9 @@
-import json
 import typing as t
 
 import jinja2
 
+import orjson
+
 from pydantic.json import pydantic_encoder
 
 import yaml
@@ -10,6 +11,21 @@ import yaml
 from . import utils
 
 
+# Use the libyaml-based loader and dumper when they are available, as they are much
+# faster than the pure-Python implementations
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+SafeDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def _yaml_load_all(stream: str) -> t.Iterable[t.Dict[str, t.Any]]:
+    """
+    Lazily parses the YAML documents in the given stream, skipping empty documents.
+    """
+    for obj in yaml.load_all(stream, Loader = SafeLoader):
+        if obj is not None:
+            yield obj
+
+
 class Loader:
     """
     Class for returning objects created by rendering YAML templates from this package.
@@ -26,20 +42,23 @@ class Loader:
         """
         Creates an environment with the given loader.
         """
-        env = jinja2.Environment(loader = loader, autoescape = False)
+        # Templates are shipped with the package and do not change while the operator is
+        # running, so there is no need for Jinja to check if cached templates are stale
+        env = jinja2.Environment(loader = loader, autoescape = False, auto_reload = False)
         env.globals.update(globals)
         env.filters.update(
             mergeconcat = utils.mergeconcat,
-            fromyaml = yaml.safe_load,
+            fromyaml = lambda data: yaml.load(data, Loader = SafeLoader),
             # In order to benefit from correct serialisation of Pydantic models,
             # we go via JSON to YAML
-            toyaml = lambda obj: yaml.safe_dump(
-                json.loads(
-                    json.dumps(
+            toyaml = lambda obj: yaml.dump(
+                orjson.loads(
+                    orjson.dumps(
                         obj,
                         default = pydantic_encoder
                     )
-                )
+                ),
+                Dumper = SafeDumper
             )
         )
         return env
@@ -71,7 +90,10 @@ class Loader:
         Render the given template string with the given params, parse the result as YAML
         and return the resulting object.
         """
-        return yaml.safe_load(self.render_string(template_str, _safe = _safe, **params))
+        return yaml.load(
+            self.render_string(template_str, _safe = _safe, **params),
+            Loader = SafeLoader
+        )
 
     def yaml_string_all(
         self,
@@ -79,12 +101,14 @@ class Loader:
         /,
         _safe: bool = True,
         **params: t.Any
-    ) -> t.Dict[str, t.Any]:
+    ) -> t.Iterable[t.Dict[str, t.Any]]:
         """
         Render the given template string with the given params, parse the result as YAML
         and return the resulting objects.
+
+        The objects are parsed lazily and empty documents are skipped.
         """
-        return yaml.safe_load_all(self.render_string(template_str, _safe = _safe, **params))
+        return _yaml_load_all(self.render_string(template_str, _safe = _safe, **params))
 
     def render_template(self, template: str, **params: t.Any) -> str:
         """
@@ -97,11 +121,17 @@ class Loader:
         Render the specified template with the given params, parse the result as YAML and
         return the resulting object.
         """
-        return yaml.safe_load(self.render_template(template, **params))
+        return yaml.load(self.render_template(template, **params), Loader = SafeLoader)
 
-    def yaml_template_all(self, template: str, **params: t.Any) -> t.Dict[str, t.Any]:
+    def yaml_template_all(
+        self,
+        template: str,
+        **params: t.Any
+    ) -> t.Iterable[t.Dict[str, t.Any]]:
         """
         Render the specified template with the given params, parse the result as YAML and
         return the resulting objects.
+
+        The objects are parsed lazily and empty documents are skipped.
         """
-        return yaml.safe_load_all(self.render_template(template, **params))
+        return _yaml_load_all(self.render_template(template, **params))
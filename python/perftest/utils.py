@@ -38,10 +38,28 @@ def check_condition(obj: t.Dict[str, t.Any], name: str) -> bool:
     Returns True if the specified condition exists and is True for the given object,
     False otherwise.
     """
-    return any(
-        condition["type"] == name and condition["status"] == "True"
-        for condition in obj.get("status", {}).get("conditions", [])
-    )
+    # Use a plain loop rather than any() with a generator, as this avoids creating a
+    # generator frame for every check
+    for condition in obj.get("status", {}).get("conditions", []):
+        if condition["type"] == name:
+            return condition["status"] == "True"
+    return False
+
+
+def lines_from(pattern: t.Pattern, text: str) -> t.Iterator[str]:
+    """
+    Returns an iterator over the lines of the given text, starting from the line that
+    contains the first match for the given pattern.
+
+    The text before that line is skipped without splitting it into lines.
+
+    Raises PodLogFormatError if the pattern does not match.
+    """
+    match = pattern.search(text)
+    if match is None:
+        raise PodLogFormatError("unable to locate results in pod log")
+    line_start = text.rfind("\n", 0, match.start()) + 1
+    return iter(text[line_start:].splitlines())
 
 
 _PREFIXES = ("", "K", "M", "G", "T", "P", "E", "Z", "Y")